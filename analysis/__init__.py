@@ -0,0 +1 @@
+"""Analysis queries and benchmarks"""
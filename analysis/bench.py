@@ -0,0 +1,59 @@
+"""
+Pipeline micro-benchmarks
+
+Times the queries the pipeline runs most often over the price panel
+(full scan, per-security aggregation, sort, join to the security master)
+so changes to storage layout or keys can be compared run to run.
+"""
+
+import time
+
+import duckdb
+
+from database.init_db import init_database
+
+
+BENCH_QUERIES = {
+    "scan": "SELECT COUNT(*) FROM prices",
+    "group_by_security": "SELECT security_id, AVG(close) FROM prices GROUP BY security_id",
+    "sort_panel": "SELECT security_id, Date FROM prices ORDER BY security_id, Date",
+    "join_securities": """
+        SELECT s.symbol, COUNT(*)
+        FROM prices p JOIN securities s USING (security_id)
+        GROUP BY s.symbol
+    """,
+}
+
+
+def run_benchmarks(conn: duckdb.DuckDBPyConnection, repeat: int = 3) -> dict:
+    """
+    Return the best wall time (seconds) of each query over `repeat` runs.
+    Queries over datasets that don't exist yet are skipped.
+    """
+    results = {}
+    for name, query in BENCH_QUERIES.items():
+        timings = []
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(query).fetchall()
+                timings.append(time.perf_counter() - start)
+        except duckdb.Error as e:
+            print(f"[WARNING] Skipping {name}: {e}")
+            continue
+        results[name] = min(timings)
+    return results
+
+
+def main(repeat: int = 3):
+    conn = init_database(":memory:")
+    results = run_benchmarks(conn, repeat)
+
+    print(f"\n{'='*60}")
+    print(f"BENCHMARKS (best of {repeat})")
+    print(f"{'='*60}")
+    for name, seconds in results.items():
+        print(f"{name:<24} {seconds * 1000:>10.1f} ms")
+    if not results:
+        print("No data to benchmark; run `python -m pipeline ingest universe` and `ingest prices` first")
+    print(f"{'='*60}")
@@ -14,11 +14,17 @@ conn.execute(f"SET s3_secret_access_key='{os.getenv('AWS_SECRET_ACCESS_KEY')}';"
 
 # Query your data!
 bucket = os.getenv('S3_BUCKET')
+# Aggregate on the integer security_id, attach symbols only for display
 result = conn.execute(f"""
-    SELECT symbol, COUNT(*) as row_count, MIN(Date) as min_date, MAX(Date) as max_date
-    FROM read_parquet('s3://{bucket}/stock-data/prices/**/*.parquet')
-    GROUP BY symbol
-    ORDER BY symbol
+    WITH stats AS (
+        SELECT security_id, COUNT(*) as row_count, MIN(Date) as min_date, MAX(Date) as max_date
+        FROM read_parquet('s3://{bucket}/stock-data/prices/**/*.parquet')
+        GROUP BY security_id
+    )
+    SELECT s.symbol, stats.*
+    FROM stats
+    JOIN read_parquet('s3://{bucket}/stock-data/security_master/securities.parquet') s USING (security_id)
+    ORDER BY s.symbol
     LIMIT 20
 """).df()
 
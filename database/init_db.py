@@ -50,7 +50,89 @@ QUESTIONS TO EXPLORE:
 TIP: DuckDB is embedded, so no server to manage. Just a file!
 """
 
-# TODO: Implement database initialization
+import os
+import duckdb
+from dotenv import load_dotenv
+
+
+def get_data_root() -> str:
+    """S3 prefix when a bucket is configured, otherwise the local data/ directory."""
+    s3_bucket = os.getenv("S3_BUCKET")
+    if s3_bucket:
+        return f"s3://{s3_bucket}/{os.getenv('S3_PREFIX', 'stock-data')}"
+    return "data"
+
+
+def configure_s3(conn: duckdb.DuckDBPyConnection):
+    conn.execute("INSTALL httpfs; LOAD httpfs;")
+    conn.execute(f"SET s3_region='{os.getenv('AWS_REGION')}';")
+    conn.execute(f"SET s3_access_key_id='{os.getenv('AWS_ACCESS_KEY_ID')}';")
+    conn.execute(f"SET s3_secret_access_key='{os.getenv('AWS_SECRET_ACCESS_KEY')}';")
+
+
+def _create_view(conn: duckdb.DuckDBPyConnection, name: str, query: str):
+    # Datasets that haven't been produced yet are skipped, not fatal
+    try:
+        conn.execute(f"CREATE OR REPLACE VIEW {name} AS {query}")
+    except duckdb.Error as e:
+        print(f"[WARNING] Skipping view {name}: {e}")
+
+
+def _create_table(conn: duckdb.DuckDBPyConnection, name: str, query: str):
+    # Before the first `ingest universe` there's no security master yet
+    try:
+        conn.execute(f"CREATE OR REPLACE TABLE {name} AS {query}")
+    except duckdb.Error as e:
+        print(f"[WARNING] Skipping table {name} (run `python -m pipeline ingest universe` first): {e}")
+
+
+def init_database(db_path: str | None = None, data_root: str | None = None) -> duckdb.DuckDBPyConnection:
+    """
+    Create (or refresh) the DuckDB catalog over the Parquet datasets.
+
+    Every table is keyed by the integer security_id from the security master.
+    The small securities table is materialized; datasets stay views over Parquet.
+    prices_display attaches symbols for ad-hoc queries and reports.
+    """
+    db_path = db_path or os.getenv("DUCKDB_PATH", "data/stocks.duckdb")
+    data_root = data_root or get_data_root()
+
+    conn = duckdb.connect(db_path)
+    if data_root.startswith("s3://"):
+        configure_s3(conn)
+
+    _create_table(conn, "securities", f"""
+        SELECT * FROM read_parquet('{data_root}/security_master/securities.parquet')
+        ORDER BY security_id
+    """)
+    _create_table(conn, "symbol_aliases", f"""
+        SELECT * FROM read_parquet('{data_root}/security_master/symbol_aliases.parquet')
+    """)
+    _create_view(conn, "prices", f"""
+        SELECT * FROM read_parquet('{data_root}/prices/**/*.parquet', hive_partitioning = true)
+    """)
+    _create_view(conn, "prices_display", """
+        SELECT s.symbol, s.exchange, p.*
+        FROM prices p
+        JOIN securities s USING (security_id)
+    """)
+    _create_view(conn, "macro_indicators", f"""
+        SELECT * FROM read_parquet('{data_root}/macro/macro.parquet')
+    """)
+    _create_view(conn, "ml_features", f"""
+        SELECT * FROM read_parquet('{data_root}/features/ml_features/**/*.parquet', hive_partitioning = true)
+    """)
+
+    tables = conn.execute("SHOW TABLES").fetchall()
+    print(f"✓ DuckDB catalog ready at {db_path}: {', '.join(t[0] for t in tables)}")
+
+    return conn
+
+
+def main():
+    load_dotenv()
+    init_database().close()
+
 
 if __name__ == "__main__":
-    pass
+    main()
@@ -0,0 +1,72 @@
+"""
+Build the ml_features Table
+
+PURPOSE:
+--------
+Combine price-based, fundamental and macro features into one security_id x
+date panel (ml_features) for training and scoring.
+
+Output: data/features/ml_features/year=YYYY/features.parquet, sorted by
+(security_id, date), plus the memory-mapped copy in data/feature_store/
+that training/scoring read via features.feature_store.FeatureStore.
+"""
+
+from pathlib import Path
+
+import polars as pl
+
+from features.feature_store import write_feature_store
+from features.macro_features import broadcast_macro
+from features.price_features import add_technical_features, load_prices_panel
+from ingestion.ingest_macro import load_macro
+from ingestion.security_master import load_security_master
+from ingestion.utils import load_settings, write_watermark
+
+
+FEATURES_DIR = "data/features/ml_features"
+
+
+def build_features(settings: dict, prices_dir: str = "data/prices") -> pl.DataFrame:
+    panel = add_technical_features(load_prices_panel(prices_dir)).collect()
+
+    macro = load_macro()
+    macro_config = settings.get("macro", {})
+    if macro.height > 0:
+        securities, _ = load_security_master()
+        panel = broadcast_macro(
+            panel,
+            macro,
+            securities,
+            macro_config.get("exchange_countries", {}),
+            macro_config.get("indicators", []),
+            macro_config.get("publication_lag_days", 90),
+        )
+    else:
+        print("[WARNING] No macro data cached; run `python -m pipeline ingest macro` first")
+
+    return panel.sort(["security_id", "date"])
+
+
+def save_features(panel: pl.DataFrame, output_dir: str = FEATURES_DIR):
+    panel = panel.with_columns(pl.col("date").dt.year().alias("year"))
+
+    for (year,), group_df in panel.group_by(["year"]):
+        partition_dir = Path(output_dir) / f"year={year}"
+        partition_dir.mkdir(parents=True, exist_ok=True)
+
+        output_file = partition_dir / "features.parquet"
+        group_df.drop("year").sort(["security_id", "date"]).write_parquet(output_file, compression="snappy")
+
+        print(f"✓ Saved {group_df.height:,} rows to {output_file}")
+
+
+def main(settings_file: str = "config/settings.yaml"):
+    panel = build_features(load_settings(settings_file))
+    save_features(panel)
+    write_feature_store(panel)
+    write_watermark(
+        FEATURES_DIR,
+        end_date=panel.get_column("date").max(),
+        securities=panel.get_column("security_id").n_unique(),
+        rows=panel.height,
+    )
@@ -0,0 +1,171 @@
+"""
+Memory-mapped feature store
+
+Keeps the built ml_features panel as an uncompressed Arrow IPC (Feather v2)
+file sorted by (security_id, date), with each security's row range stored
+in the file's schema metadata. Readers memory-map the file, so:
+
+- get() returns zero-copy slices; nothing is decompressed or re-parsed
+- every process (tuning workers, scoring service, backtests) shares the
+  same pages through the OS page cache
+- opening the store is instant regardless of panel size
+
+Layout (data/feature_store/):
+    ml_features.arrow   the panel, one record batch; metadata "row_ranges"
+                        maps security_id -> (start, length)
+
+Panel and index live in one file replaced with a single rename, so a reader
+can never pair a new panel with an old index.
+"""
+
+import json
+import numbers
+import os
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pyarrow as pa
+
+from ingestion.security_master import load_security_master, resolve_security_ids
+
+
+FEATURE_STORE_DIR = "data/feature_store"
+PANEL_FILE = "ml_features.arrow"
+
+
+def _write_ipc(table: pa.Table, path: Path):
+    # Write then rename: readers that already mapped the old file keep it
+    tmp_path = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, path)
+
+
+def write_feature_store(panel: pl.DataFrame, store_dir: str = FEATURE_STORE_DIR):
+    """Save a security_id x date panel (with a `date` column) to the store."""
+    panel = panel.sort(["security_id", "date"])
+
+    index = (
+        panel.with_row_index("row")
+        .group_by("security_id", maintain_order=True)
+        .agg([
+            pl.col("row").first().cast(pl.Int64).alias("start"),
+            pl.len().cast(pl.Int64).alias("length"),
+        ])
+    )
+
+    row_ranges = {
+        "security_id": index.get_column("security_id").to_list(),
+        "start": index.get_column("start").to_list(),
+        "length": index.get_column("length").to_list(),
+    }
+    table = panel.to_arrow().combine_chunks()
+    table = table.replace_schema_metadata({"row_ranges": json.dumps(row_ranges)})
+
+    output_dir = Path(store_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    _write_ipc(table, output_dir / PANEL_FILE)
+
+    print(f"✓ Feature store: {panel.height:,} rows, {index.height:,} securities in {output_dir}")
+
+
+class FeatureStore:
+    def __init__(self, store_dir: str = FEATURE_STORE_DIR):
+        self.table = pa.ipc.open_file(pa.memory_map(str(Path(store_dir) / PANEL_FILE), "r")).read_all()
+
+        row_ranges = json.loads(self.table.schema.metadata[b"row_ranges"])
+        self.ranges = dict(zip(row_ranges["security_id"], zip(row_ranges["start"], row_ranges["length"])))
+
+        # Dates as int32 days since epoch, viewed straight from the mapped buffer
+        dates = self.table.column("date")
+        if dates.num_chunks > 0:
+            self.dates = dates.chunk(0).view(pa.int32()).to_numpy()
+        else:
+            self.dates = np.empty(0, dtype=np.int32)
+
+        self._aliases = None
+
+    @property
+    def columns(self) -> list[str]:
+        return self.table.column_names
+
+    def _resolve_symbols(self, symbols: list) -> list[int]:
+        """
+        Accept security_ids (any integer type) or symbols ("AAPL.US", or bare
+        "AAPL" for US). Input order is kept and duplicates dropped, so an ID
+        and its symbol (or two aliases) select the security once.
+        """
+        names = [s for s in symbols if not isinstance(s, numbers.Integral)]
+        if names and self._aliases is None:
+            _, self._aliases = load_security_master()
+
+        security_ids = []
+        for symbol in symbols:
+            if isinstance(symbol, numbers.Integral):
+                security_ids.append(int(symbol))
+            else:
+                security_ids.extend(resolve_security_ids([symbol], self._aliases))
+
+        return list(dict.fromkeys(security_ids))
+
+    def get_arrow(
+        self,
+        symbols: list | None = None,
+        date_range: tuple | None = None,
+        columns: list[str] | None = None,
+    ) -> pa.Table:
+        """
+        Zero-copy slice of the panel.
+
+        Args:
+            symbols: security_ids or symbols; None for all securities
+            date_range: (start, end) inclusive, as date or "YYYY-MM-DD"; either end may be None
+            columns: feature columns to return (security_id and date are always included)
+        """
+        table = self.table
+        if columns is not None:
+            keep = ["security_id", "date"] + [c for c in columns if c not in ("security_id", "date")]
+            table = table.select(keep)
+
+        if symbols is None and date_range is None:
+            ranges = [(0, table.num_rows)]
+        elif symbols is None:
+            # Dates are only sorted within a security, so clip each range
+            ranges = list(self.ranges.values())
+        else:
+            ranges = [self.ranges[i] for i in self._resolve_symbols(symbols) if i in self.ranges]
+
+        if date_range is not None:
+            start_day, end_day = (_to_epoch_day(d) for d in date_range)
+            ranges = [self._clip_dates(start, length, start_day, end_day) for start, length in ranges]
+
+        slices = [table.slice(start, length) for start, length in ranges if length > 0]
+        if not slices:
+            return table.slice(0, 0)
+        return pa.concat_tables(slices)
+
+    def get(
+        self,
+        symbols: list | None = None,
+        date_range: tuple | None = None,
+        columns: list[str] | None = None,
+    ) -> pl.DataFrame:
+        return pl.from_arrow(self.get_arrow(symbols, date_range, columns), rechunk=False)
+
+    def _clip_dates(self, start: int, length: int, start_day: int | None, end_day: int | None) -> tuple[int, int]:
+        """Narrow one security's row range to a date window (its rows are date-sorted)."""
+        dates = self.dates[start:start + length]
+        lo = 0 if start_day is None else int(np.searchsorted(dates, start_day, side="left"))
+        hi = length if end_day is None else int(np.searchsorted(dates, end_day, side="right"))
+        return start + lo, max(hi - lo, 0)
+
+
+def _to_epoch_day(value) -> int | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return (value - date(1970, 1, 1)).days
@@ -0,0 +1,74 @@
+"""
+Macro regime features
+
+Broadcasts the cached macro indicators (ingestion/ingest_macro.py) onto the
+security_id x date panel. Each series is as-of joined onto the panel's
+distinct trading dates only (a few thousand rows per country), then that
+small date table is joined onto the panel, so the macro series is never
+cross-joined with the symbol universe.
+
+Point-in-time: an observation only becomes visible `publication_lag_days`
+after its date.
+"""
+
+from datetime import timedelta
+
+import polars as pl
+
+
+def macro_calendar(
+    dates: pl.DataFrame,
+    macro: pl.DataFrame,
+    country: str,
+    indicators: list[str],
+    publication_lag_days: int,
+) -> pl.DataFrame:
+    """
+    One row per panel date for a single country, with a `macro_<indicator>`
+    column holding the latest value already published on that date.
+    """
+    calendar = dates.sort("date")
+
+    for indicator in indicators:
+        series = (
+            macro.filter((pl.col("country") == country) & (pl.col("indicator") == indicator))
+            .select([
+                (pl.col("date") + timedelta(days=publication_lag_days)).alias("available_date"),
+                pl.col("value").alias(f"macro_{indicator}"),
+            ])
+            .sort("available_date")
+        )
+        calendar = calendar.join_asof(series, left_on="date", right_on="available_date", strategy="backward")
+        calendar = calendar.drop("available_date")
+
+    return calendar
+
+
+def broadcast_macro(
+    panel: pl.DataFrame,
+    macro: pl.DataFrame,
+    securities: pl.DataFrame,
+    exchange_countries: dict[str, str],
+    indicators: list[str],
+    publication_lag_days: int,
+) -> pl.DataFrame:
+    """Add macro_* columns to the panel, matching each security to its exchange's country."""
+    security_countries = securities.select([
+        "security_id",
+        pl.col("exchange").replace(exchange_countries).alias("country"),
+    ])
+    dates = panel.select("date").unique()
+
+    calendars = [
+        macro_calendar(dates, macro, country, indicators, publication_lag_days)
+        .with_columns(pl.lit(country).alias("country"))
+        for country in security_countries.get_column("country").unique().to_list()
+    ]
+    if not calendars:
+        return panel
+
+    return (
+        panel.join(security_countries, on="security_id", how="left")
+        .join(pl.concat(calendars), on=["country", "date"], how="left")
+        .drop("country")
+    )
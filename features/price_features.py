@@ -0,0 +1,32 @@
+"""
+Price-based (technical) features
+
+Computes the `features.technical` list from config/settings.yaml on the
+security_id x date price panel. All windows are per security; the panel
+must be sorted by (security_id, date).
+"""
+
+import polars as pl
+
+
+def load_prices_panel(prices_dir: str = "data/prices") -> pl.LazyFrame:
+    """Lazy scan of the partitioned price Parquet, with a typed `date` column."""
+    return (
+        pl.scan_parquet(f"{prices_dir}/**/*.parquet")
+        .with_columns(pl.col("Date").str.strptime(pl.Date, "%Y-%m-%d").alias("date"))
+        .drop("Date")
+        .sort(["security_id", "date"])
+    )
+
+
+def add_technical_features(prices: pl.LazyFrame) -> pl.LazyFrame:
+    close = pl.col("Adjusted_close")
+    returns_1d = close.pct_change(1)
+
+    return prices.with_columns([
+        returns_1d.over("security_id").alias("returns_1d"),
+        close.pct_change(5).over("security_id").alias("returns_5d"),
+        close.pct_change(20).over("security_id").alias("returns_20d"),
+        returns_1d.rolling_std(20).over("security_id").alias("volatility_20d"),
+        pl.col("Volume").cast(pl.Float64).rolling_mean(20).over("security_id").alias("volume_20d_avg"),
+    ])
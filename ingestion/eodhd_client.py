@@ -1,59 +1,121 @@
+import os
+import json
 import time
 import requests
 import polars as pl
 from io import StringIO
+from datetime import date, timedelta
+
+from ingestion.http_cache import OfflineCacheMiss, ResponseCache, cache_key
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Cache TTLs (seconds) per endpoint for data that can still change
+CACHE_TTLS = {
+    "eod": 12 * HOUR,
+    "fundamentals": 7 * DAY,
+    "div": DAY,
+    "splits": DAY,
+    "macro-indicator-data": 7 * DAY,
+}
+
+# A range ending this long ago is closed: late corrections have settled,
+# so its prices/dividends/splits are cached forever
+CLOSED_RANGE_DAYS = 7
+
 
 class EODHDClient:
-    def __init__(self, api_key: str, rate_limit_delay: float = 0.06):
+    def __init__(
+        self,
+        api_key: str,
+        rate_limit_delay: float = 0.06,
+        cache: ResponseCache | None = None,
+        offline: bool | None = None,
+    ):
         self.api_key = api_key
         self.base_url = "https://eodhd.com/api"
         self.rate_limit_delay = rate_limit_delay
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        if offline is None:
+            offline = os.getenv("EODHD_OFFLINE", "").lower() in ("1", "true", "yes")
+        self.offline = offline
 
     def _throttle(self):
         time.sleep(self.rate_limit_delay)
 
-    def get_eod_prices(self, symbol: str, start_date: str, end_date: str) -> pl.DataFrame:
-        self._throttle()
+    def _ttl(self, endpoint: str, params: dict) -> float | None:
+        end_date = params.get("to")
+        if end_date and date.fromisoformat(end_date) < date.today() - timedelta(days=CLOSED_RANGE_DAYS):
+            return None
+        return CACHE_TTLS.get(endpoint, DAY)
+
+    def _get(self, endpoint: str, path: str, params: dict, parse=json.loads):
+        """
+        GET {base_url}/{path} and return parse(body), served from the on-disk
+        cache when fresh. A body is only cached after it parses, so a
+        malformed response is never kept. Only network calls are throttled.
+        Raises requests.RequestException (OfflineCacheMiss in offline mode)
+        on failure, or whatever parse raises.
+        """
+        key = cache_key(path, params)
+        if self.cache is not None:
+            body = self.cache.get(key, self._ttl(endpoint, params))
+            if body is not None:
+                return parse(body.decode())
+
+        if self.offline:
+            raise OfflineCacheMiss(f"offline and not cached: /{path}")
 
-        url = f"{self.base_url}/eod/{symbol}"
+        self._throttle()
+        response = requests.get(
+            f"{self.base_url}/{path}",
+            params={**params, "api_token": self.api_key},
+            timeout=15,
+        )
+        response.raise_for_status()
+
+        parsed = parse(response.text)
+        if self.cache is not None:
+            self.cache.put(key, response.content)
+        return parsed
+
+    def get_eod_prices(self, symbol: str, start_date: str, end_date: str, raise_errors: bool = False) -> pl.DataFrame:
+        """
+        Daily bars as a DataFrame; empty if there's no data or the body isn't
+        valid CSV. Request failures also return an empty frame unless
+        raise_errors=True, in which case the requests exception propagates so
+        callers can tell "no data" from "couldn't fetch".
+        """
         params = {
-            "api_token": self.api_key,
             "from": start_date,
             "to": end_date,
             "fmt": "csv"
         }
 
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
+            df = self._get("eod", f"eod/{symbol}", params, parse=lambda text: pl.read_csv(StringIO(text)))
         except requests.RequestException as e:
+            if raise_errors:
+                raise
             print(f"[ERROR] Failed to fetch {symbol}: {e}")
             return pl.DataFrame()  # return empty DF for consistency
-
-        try:
-            df = pl.read_csv(StringIO(response.text))
-            df = df.with_columns([
-                pl.lit(symbol).alias("symbol")
-            ])
-            return df
         except Exception as e:
             print(f"[ERROR] Failed to parse CSV for {symbol}: {e}")
             return pl.DataFrame()
+
+        return df.with_columns([
+            pl.lit(symbol).alias("symbol")
+        ])
         
     def get_fundamentals(self, symbol: str, filter: str) -> dict:
-        self._throttle()
-
-        url = f"{self.base_url}/fundamentals/{symbol}"
         params = {
-            "api_token": self.api_key,
             "filter": filter,
             "fmt": "json"
         }
 
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            return response.json()
+            return self._get("fundamentals", f"fundamentals/{symbol}", params)
         except requests.RequestException as e:
             print(f"[ERROR] Failed to fetch {symbol}: {e}")
             return {}
@@ -76,30 +138,20 @@ class EODHDClient:
         return results
     
     def get_macro_indicator(self, country: str, indicator: str) -> list:
-        self._throttle()
-
-        url = f"{self.base_url}/macro-indicator-data"
         params = {
-            "api_token": self.api_key,
             "country": country,
             "indicator": indicator,
             "fmt": "json"
         }
 
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self._get("macro-indicator-data", "macro-indicator-data", params)
+        except (requests.RequestException, ValueError) as e:
             print(f"[ERROR] Macro indicator failed: {e}")
             return []
         
     def get_dividends(self, symbol: str, start_date: str, end_date: str) -> list:
-        self._throttle()
-
-        url = f"{self.base_url}/div/{symbol}"
         params = {
-            "api_token": self.api_key,
             "from": start_date,
             "fmt": "json"
         }
@@ -108,19 +160,13 @@ class EODHDClient:
             params["to"] = end_date
 
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self._get("div", f"div/{symbol}", params)
+        except (requests.RequestException, ValueError) as e:
             print(f"[ERROR] Dividends failed for {symbol}: {e}")
             return []
         
     def get_splits(self, symbol: str, start_date: str, end_date: str) -> list:
-        self._throttle()
-
-        url = f"{self.base_url}/splits/{symbol}"
         params = {
-            "api_token": self.api_key,
             "from": start_date,
             "fmt": "json"
         }
@@ -129,10 +175,8 @@ class EODHDClient:
             params["to"] = end_date
 
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self._get("splits", f"splits/{symbol}", params)
+        except (requests.RequestException, ValueError) as e:
             print(f"[ERROR] Splits failed for {symbol}: {e}")
             return []
         
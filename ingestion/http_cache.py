@@ -0,0 +1,135 @@
+"""
+On-disk HTTP response cache for EODHDClient
+
+Responses are stored content-addressed: the file name is the SHA-256 of the
+endpoint path plus its normalized query params (api_token removed, keys
+sorted), so the same request from any run, process or collaborator's
+checkout maps to the same entry. Bodies are zlib-compressed.
+
+- Expiry: the caller passes a TTL per lookup (None = never expires); age is
+  the file's mtime.
+- Eviction: least recently used first (hits bump the file's atime) once the
+  cache grows past max_bytes.
+- Offline mode: the client serves only from cache and raises OfflineCacheMiss
+  instead of calling the API.
+
+Configured from the environment:
+    EODHD_CACHE_DIR      default data/http_cache ("off" disables caching)
+    EODHD_CACHE_MAX_MB   default 2048
+    EODHD_OFFLINE        1/true to never call the API
+"""
+
+import hashlib
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+
+import requests
+
+
+DEFAULT_CACHE_DIR = "data/http_cache"
+DEFAULT_MAX_MB = 2048
+
+
+class OfflineCacheMiss(requests.RequestException):
+    """Raised in offline mode when a request isn't cached; handled like any failed request."""
+
+
+def cache_key(path: str, params: dict) -> str:
+    normalized = sorted((k, str(v)) for k, v in params.items() if k != "api_token" and v is not None)
+    return hashlib.sha256(json.dumps([path, normalized]).encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._size = None  # computed lazily on first write
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache | None":
+        cache_dir = os.getenv("EODHD_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if cache_dir.lower() in ("", "off", "none"):
+            return None
+        max_mb = int(os.getenv("EODHD_CACHE_MAX_MB", str(DEFAULT_MAX_MB)))
+        return cls(cache_dir, max_mb * 1024 * 1024)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.zz"
+
+    def get(self, key: str, ttl: float | None) -> bytes | None:
+        """Return the cached body, or None if missing or older than ttl seconds."""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        now = time.time()
+        if ttl is not None and now - stat.st_mtime > ttl:
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                body = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+        # Mark as recently used for LRU; keep mtime (= when it was stored).
+        # Another shard may have evicted it since the read; the body is still good
+        try:
+            os.utime(path, (now, stat.st_mtime))
+        except FileNotFoundError:
+            pass
+        return body
+
+    def put(self, key: str, body: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Overwriting a key replaces its bytes rather than adding to them
+        try:
+            old_size = path.stat().st_size
+        except FileNotFoundError:
+            old_size = 0
+
+        # Write then rename so concurrent shards never read a partial entry
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(body, 6))
+        os.replace(tmp_path, path)
+
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self.cache_dir.rglob("*.zz"))
+        else:
+            self._size += path.stat().st_size - old_size
+
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_fraction: float = 0.9):
+        """Delete least recently used entries until the cache is under target_fraction of max_bytes."""
+        entries = []
+        for path in self.cache_dir.rglob("*.zz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        target = self.max_bytes * target_fraction
+
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+            removed += 1
+
+        self._size = size
+        print(f"✓ HTTP cache: evicted {removed} entries, {size / 1024 / 1024:.0f} MB left")
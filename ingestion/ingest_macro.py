@@ -0,0 +1,161 @@
+"""
+Macro Indicator Ingestion
+
+Fetches the indicators configured under `macro:` in config/settings.yaml for
+each country once, and caches them in a small typed Parquet table
+(data/macro/macro.parquet). A series is only re-requested when a new
+observation is expected: its last observation date plus one period plus the
+publication lag has passed, and it hasn't been checked in `recheck_days`.
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+from dotenv import load_dotenv
+
+from ingestion.eodhd_client import EODHDClient
+from ingestion.utils import load_settings, write_watermark
+
+
+MACRO_DIR = "data/macro"
+MACRO_FILE = "macro.parquet"
+
+MACRO_SCHEMA = {
+    "country": pl.Utf8,
+    "indicator": pl.Utf8,
+    "date": pl.Date,
+    "period": pl.Utf8,
+    "value": pl.Float64,
+    "fetched_at": pl.Datetime,
+}
+
+# Approximate spacing between observations, by EODHD "Period"
+PERIOD_DAYS = {
+    "Annual": 365,
+    "Quarterly": 91,
+    "Monthly": 30,
+}
+
+
+def load_macro(macro_dir: str = MACRO_DIR) -> pl.DataFrame:
+    path = Path(macro_dir) / MACRO_FILE
+    if not path.exists():
+        return pl.DataFrame(schema=MACRO_SCHEMA)
+    return pl.read_parquet(path)
+
+
+def parse_macro_response(records: list, country: str, indicator: str, fetched_at: datetime) -> pl.DataFrame:
+    """Convert the EODHD JSON list ({Date, Period, Value, ...}) into MACRO_SCHEMA rows."""
+    rows = [
+        {
+            "country": country,
+            "indicator": indicator,
+            "date": date.fromisoformat(record["Date"]),
+            "period": record.get("Period"),
+            "value": float(record["Value"]),
+            "fetched_at": fetched_at,
+        }
+        for record in records
+        if record.get("Date") and record.get("Value") is not None
+    ]
+    return pl.DataFrame(rows, schema=MACRO_SCHEMA)
+
+
+def is_refresh_due(
+    cached: pl.DataFrame,
+    country: str,
+    indicator: str,
+    today: date,
+    publication_lag_days: int,
+    recheck_days: int,
+) -> bool:
+    series = cached.filter((pl.col("country") == country) & (pl.col("indicator") == indicator))
+    if series.height == 0:
+        return True
+
+    last_fetched = series.get_column("fetched_at").max().date()
+    if today - last_fetched < timedelta(days=recheck_days):
+        return False
+
+    last_date = series.get_column("date").max()
+    period = series.get_column("period").drop_nulls().tail(1).to_list()
+    period_days = PERIOD_DAYS.get(period[0] if period else None, PERIOD_DAYS["Annual"])
+
+    next_release = last_date + timedelta(days=period_days + publication_lag_days)
+    return today >= next_release
+
+
+def refresh_macro(
+    client: EODHDClient,
+    cached: pl.DataFrame,
+    countries: list[str],
+    indicators: list[str],
+    publication_lag_days: int,
+    recheck_days: int,
+    today: date | None = None,
+) -> tuple[pl.DataFrame, dict]:
+    """Re-fetch only the (country, indicator) series that are due; keep the rest from cache."""
+    today = today or date.today()
+    fetched_at = datetime.now()
+
+    refreshed = []
+    skipped = 0
+    failed = []
+
+    for country in countries:
+        for indicator in indicators:
+            if not is_refresh_due(cached, country, indicator, today, publication_lag_days, recheck_days):
+                skipped += 1
+                continue
+
+            records = client.get_macro_indicator(country, indicator)
+            if not records:
+                failed.append(f"{country}:{indicator}")
+                continue
+
+            refreshed.append(parse_macro_response(records, country, indicator, fetched_at))
+
+    macro = cached
+    if refreshed:
+        new_data = pl.concat(refreshed)
+        replaced = new_data.select(["country", "indicator"]).unique()
+        macro = pl.concat([
+            cached.join(replaced, on=["country", "indicator"], how="anti"),
+            new_data,
+        ])
+
+    summary = {"refreshed": len(refreshed), "skipped": skipped, "failed": failed}
+    return macro.sort(["country", "indicator", "date"]), summary
+
+
+def main(settings_file: str = "config/settings.yaml"):
+    load_dotenv()
+
+    config = load_settings(settings_file)["macro"]
+    client = EODHDClient(os.getenv("EODHD_API_KEY"))
+
+    macro, summary = refresh_macro(
+        client,
+        load_macro(),
+        config["countries"],
+        config["indicators"],
+        config.get("publication_lag_days", 90),
+        config.get("recheck_days", 7),
+    )
+
+    output_dir = Path(MACRO_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    macro.write_parquet(output_dir / MACRO_FILE, compression="snappy")
+    write_watermark(MACRO_DIR, series=summary["refreshed"] + summary["skipped"], rows=macro.height)
+
+    print(f"✓ Macro: {summary['refreshed']} series refreshed, {summary['skipped']} up to date, {macro.height:,} rows")
+    if summary["failed"]:
+        print(f"[WARNING] Failed series: {', '.join(summary['failed'])}")
+
+    s3_bucket = os.getenv("S3_BUCKET")
+    if s3_bucket and summary["refreshed"]:
+        from ingestion.ingest_prices import upload_to_s3
+
+        upload_to_s3(MACRO_DIR, s3_bucket, "stock-data/macro")
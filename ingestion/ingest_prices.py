@@ -1,14 +1,36 @@
 import os
-import sys
-from datetime import datetime, timedelta
+import shutil
+from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 import polars as pl
-import boto3
-from botocore.exceptions import ClientError
+import requests
 from tqdm import tqdm
 
-from eodhd_client import EODHDClient
+from ingestion.eodhd_client import EODHDClient
+from ingestion.utils import load_settings, write_watermark
+from ingestion.sharding import (
+    SUCCESS_MARKER,
+    filter_shard,
+    is_shard_done,
+    mark_shard_done,
+    merge_shards,
+    parse_shard,
+    rate_limit_delay,
+    read_shard_markers,
+    shard_dir,
+    shard_run_id,
+)
+from ingestion.security_master import (
+    SECURITY_MASTER_DIR,
+    build_security_master,
+    load_security_master,
+    load_symbol_changes,
+    load_universe_ids,
+    resolve_security_ids,
+    save_security_master,
+    save_universe,
+)
 
 
 def format_symbol(symbol: str, exchange: str = "US") -> str:
@@ -17,43 +39,127 @@ def format_symbol(symbol: str, exchange: str = "US") -> str:
     return symbol
 
 
-def load_tickers(ticker_file: str) -> list[str]:
+def read_ticker_file(ticker_file: str) -> list[str]:
     with open(ticker_file, 'r') as file:
-        tickers = [line.strip() for line in file if line.strip()]
-    
+        tickers = [line.strip() for line in file if line.strip() and not line.startswith("#")]
+
+    # Drop duplicates, keep file order
+    return list(dict.fromkeys(tickers))
+
+
+def load_tickers(ticker_file: str) -> list[str]:
     # Format with exchange suffix
-    return [format_symbol(ticker) for ticker in tickers]
+    return [format_symbol(ticker) for ticker in read_ticker_file(ticker_file)]
+
+
+def ticker_files_for_exchanges(exchanges: list[str], us_ticker_file: str = "config/tickers.txt") -> dict[str, str]:
+    """US uses the main ticker file; other exchanges use config/tickers_<EXCHANGE>.txt if present."""
+    ticker_files = {}
+    for exchange in exchanges:
+        ticker_file = us_ticker_file if exchange == "US" else f"config/tickers_{exchange}.txt"
+        if Path(ticker_file).exists():
+            ticker_files[exchange] = ticker_file
+        else:
+            print(f"[WARNING] No ticker file for exchange {exchange} ({ticker_file})")
+    return ticker_files
+
+
+def load_universe(ticker_files: dict[str, str], master_dir: str = SECURITY_MASTER_DIR) -> pl.DataFrame:
+    """
+    Update the security master from the ticker files ({exchange: path}) and
+    return the securities to ingest: only those listed in the files (one row
+    per security_id, renamed tickers collapsed). A renamed or delisted
+    security is included only when one of its symbols is listed.
+    """
+    tickers_by_exchange = {exchange: read_ticker_file(ticker_file) for exchange, ticker_file in ticker_files.items()}
+    securities, aliases = build_security_master(
+        tickers_by_exchange,
+        load_symbol_changes(),
+        existing=load_security_master(master_dir),
+    )
+    save_security_master(securities, aliases, master_dir)
+
+    security_ids = []
+    for exchange, tickers in tickers_by_exchange.items():
+        security_ids.extend(resolve_security_ids(tickers, aliases, exchange))
+    save_universe(security_ids, master_dir)
+
+    return securities.filter(pl.col("security_id").is_in(security_ids))
+
+
+def is_retryable(error: requests.RequestException) -> bool:
+    """Transport errors, rate limiting and server errors; a 4xx (e.g. unknown ticker) won't change on retry."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return True
 
 
 def fetch_prices_for_tickers(
     client: EODHDClient, 
-    tickers: list[str], 
+    securities: pl.DataFrame, 
     start_date: str, 
-    end_date: str
+    end_date: str,
+    position: int = 0,
 ) -> tuple[pl.DataFrame, dict]: 
-    
+    """
+    Fetch daily bars for each security. Tickers whose request failed in a
+    way worth retrying go to failed_tickers; tickers that returned no data
+    (dead or misspelled symbols, delisted names without bars) go to
+    no_data_tickers and are only reported.
+    """
     all_data = []
     failed_tickers = []
+    no_data_tickers = []
     successful_tickers = []
 
-    for ticker in tqdm(tickers):
-        df = client.get_eod_prices(ticker, start_date, end_date)
+    for security in tqdm(securities.iter_rows(named=True), total=securities.height, position=position):
+        ticker = format_symbol(security["symbol"], security["exchange"])
+
+        # Delisted securities only have history up to their delisting date
+        ticker_end_date = end_date
+        if security["delisted_date"] is not None:
+            ticker_end_date = min(end_date, security["delisted_date"].isoformat())
+            if ticker_end_date < start_date:
+                continue
+
+        try:
+            df = client.get_eod_prices(ticker, start_date, ticker_end_date, raise_errors=True)
+        except requests.RequestException as e:
+            print(f"[ERROR] Failed to fetch {ticker}: {e}")
+            if is_retryable(e):
+                failed_tickers.append(ticker)
+            else:
+                no_data_tickers.append(ticker)
+            continue
+
         if df.height > 0:
-            all_data.append(df)
+            # Key by integer security_id; the symbol string is not stored
+            all_data.append(df.with_columns([
+                pl.lit(security["security_id"], dtype=pl.Int32).alias("security_id")
+            ]).drop("symbol"))
             successful_tickers.append(ticker)
         else:
-            failed_tickers.append(ticker)
+            no_data_tickers.append(ticker)
 
     if not all_data:
         print("[ERROR] No data fetched for any ticker")
-        return pl.DataFrame(), {"success": 0, "failed": len(tickers), "failed_tickers": failed_tickers}
+        return pl.DataFrame(), {
+            "total_tickers": securities.height,
+            "successful": 0,
+            "failed": len(failed_tickers),
+            "failed_tickers": failed_tickers,
+            "no_data_tickers": no_data_tickers,
+            "total_rows": 0,
+        }
 
     combined_df = pl.concat(all_data)
     summary = {
-        "total_tickers": len(tickers),
+        "total_tickers": securities.height,
         "successful": len(successful_tickers),
         "failed": len(failed_tickers),
         "failed_tickers": failed_tickers,
+        "no_data_tickers": no_data_tickers,
         "total_rows": len(combined_df),
     }
 
@@ -64,6 +170,7 @@ def partition_and_save_local(df: pl.DataFrame, output_dir: str):
     """
     Save DataFrame to partitioned Parquet files locally.
     Partitions by year: data/prices/year=2024/prices.parquet
+    Rows are sorted by (security_id, date) so joins and range scans stay cheap.
     """
     df = df.with_columns([
         pl.col("Date").str.strptime(pl.Date, "%Y-%m-%d").alias("date_parsed")
@@ -77,7 +184,7 @@ def partition_and_save_local(df: pl.DataFrame, output_dir: str):
         partition_dir.mkdir(parents=True, exist_ok=True)
 
         # Drop unneeded helper columns
-        clean_df = group_df.drop(["date_parsed", "year"])
+        clean_df = group_df.sort(["security_id", "date_parsed"]).drop(["date_parsed", "year"])
 
         output_file = partition_dir / "prices.parquet"
         clean_df.write_parquet(
@@ -88,17 +195,21 @@ def partition_and_save_local(df: pl.DataFrame, output_dir: str):
         print(f"✓ Saved {len(clean_df):,} rows to {output_file}")
 
 
-def upload_to_s3(local_dir: str, s3_bucket: str, s3_prefix: str):
+def upload_to_s3(local_dir: str, s3_bucket: str, s3_prefix: str, pattern: str = "*.parquet"):
+    # boto3 is slow to import; only pay for it when actually uploading
+    import boto3
+    from botocore.exceptions import ClientError
+
     # Initialize s3 client
     s3_client = boto3.client('s3')
 
     local_path = Path(local_dir)
 
     # Find all parquet files recursively
-    parquet_files = list(local_path.rglob("*.parquet"))
+    parquet_files = [path for path in local_path.rglob(pattern) if path.is_file()]
 
     if not parquet_files:
-        print(f"[WARNING] No parquet files found in {local_dir}")
+        print(f"[WARNING] No {pattern} files found in {local_dir}")
         return
     
     print(f"Found {len(parquet_files)} files to upload")
@@ -126,7 +237,120 @@ def upload_to_s3(local_dir: str, s3_bucket: str, s3_prefix: str):
     print(f"✓ Upload complete to s3://{s3_bucket}/{s3_prefix}")
 
 
-def main():
+def download_from_s3(s3_bucket: str, s3_prefix: str, local_dir: str):
+    """Mirror every object under s3://bucket/prefix into local_dir."""
+    import boto3
+
+    s3_client = boto3.client('s3')
+    paginator = s3_client.get_paginator('list_objects_v2')
+
+    count = 0
+    for page in paginator.paginate(Bucket=s3_bucket, Prefix=f"{s3_prefix}/"):
+        for obj in page.get("Contents", []):
+            local_file = Path(local_dir) / obj["Key"][len(s3_prefix) + 1:]
+            local_file.parent.mkdir(parents=True, exist_ok=True)
+            s3_client.download_file(s3_bucket, obj["Key"], str(local_file))
+            count += 1
+
+    print(f"✓ Downloaded {count} files from s3://{s3_bucket}/{s3_prefix}")
+
+
+def ingest_shard(
+    shard_index: int,
+    num_shards: int,
+    securities: pl.DataFrame,
+    start_date: str,
+    end_date: str,
+    api_key: str,
+    delay: float,
+    staging_dir: str,
+    force: bool = False,
+) -> dict:
+    """
+    Fetch one shard of the universe into <staging_dir>/shard=III-of-NNN/.
+    A shard already finished for the same date range and securities is
+    skipped unless force=True. The shard is only marked done when no fetch failed with a
+    retryable error, so a rerun retries those; tickers that simply returned
+    no data are recorded in the marker and don't hold the shard back. Runs
+    in its own process (or host), so it builds its own client.
+    """
+    run_id = shard_run_id(securities, shard_index, num_shards, start_date, end_date)
+    if is_shard_done(staging_dir, shard_index, num_shards, run_id) and not force:
+        print(f"✓ Shard {shard_index}/{num_shards} already done, skipping")
+        return {
+            "total_tickers": 0,
+            "successful": 0,
+            "failed": 0,
+            "failed_tickers": [],
+            "no_data_tickers": [],
+            "total_rows": 0,
+        }
+
+    # Drop leftovers from an earlier or interrupted run of this shard
+    shutil.rmtree(shard_dir(staging_dir, shard_index, num_shards), ignore_errors=True)
+
+    client = EODHDClient(api_key, rate_limit_delay=delay)
+    shard_securities = filter_shard(securities, shard_index, num_shards)
+
+    df, summary = fetch_prices_for_tickers(client, shard_securities, start_date, end_date, position=shard_index)
+    if df.height > 0:
+        partition_and_save_local(df, str(shard_dir(staging_dir, shard_index, num_shards)))
+
+    if summary["no_data_tickers"]:
+        print(f"[WARNING] Shard {shard_index}/{num_shards}: no data for {len(summary['no_data_tickers'])} tickers")
+    if summary["failed"] == 0:
+        mark_shard_done(staging_dir, shard_index, num_shards, run_id, summary)
+    else:
+        print(f"[WARNING] Shard {shard_index}/{num_shards}: {summary['failed']} tickers failed; not marked done")
+    return summary
+
+
+def combine_summaries(summaries: list[dict]) -> dict:
+    return {
+        "total_tickers": sum(s["total_tickers"] for s in summaries),
+        "successful": sum(s["successful"] for s in summaries),
+        "failed": sum(s["failed"] for s in summaries),
+        "failed_tickers": [t for s in summaries for t in s["failed_tickers"]],
+        "no_data_tickers": [t for s in summaries for t in s.get("no_data_tickers", [])],
+        "total_rows": sum(s["total_rows"] for s in summaries),
+    }
+
+
+def save_failed_tickers(failed_tickers: list[str]):
+    print(f"\nFailed tickers: {', '.join(failed_tickers)}")
+    # Save failed tickers to file for retry
+    with open("data/failed_tickers.txt", "w") as f:
+        f.write("\n".join(failed_tickers))
+    print("Failed tickers saved to data/failed_tickers.txt")
+
+
+def save_no_data_tickers(no_data_tickers: list[str]):
+    print(f"\nNo data for: {', '.join(no_data_tickers)}")
+    # Usually dead or misspelled symbols; check them against the ticker file
+    with open("data/no_data_tickers.txt", "w") as f:
+        f.write("\n".join(no_data_tickers))
+    print("No-data tickers saved to data/no_data_tickers.txt")
+
+
+def main(
+    ticker_file: str = "config/tickers.txt",
+    start_date: str = "2005-01-01",  # 20 years back
+    end_date: str | None = None,
+    workers: int = 1,
+    shard: str | None = None,
+    merge: int | None = None,
+    split_budget: bool = False,
+    force: bool = False,
+):
+    """
+    Modes:
+        workers=1 (default): one process fetches the whole universe.
+        workers=N:           N local processes, one shard each, then merge.
+        shard="i/N":         run only shard i of N (one host of a multi-host
+                             run); results are staged (and uploaded to S3).
+        merge=N:             merge N finished shards into data/prices; the
+                             date range is read from the shards' markers.
+    """
     import time
     start_time = time.time()
     # Load environment variables
@@ -135,33 +359,117 @@ def main():
     # Configuration
     api_key = os.getenv("EODHD_API_KEY")
     s3_bucket = os.getenv("S3_BUCKET")
-    ticker_file = "config/tickers.txt"
-    start_date = "2005-01-01"  # 20 years back
-    end_date = datetime.now().strftime("%Y-%m-%d")
-    
-    # Initialize client
-    client = EODHDClient(api_key)
-    
-    # Load tickers
-    tickers = load_tickers(ticker_file)
-    print(f"Loaded {len(tickers)} tickers")
+    end_date = end_date or datetime.now().strftime("%Y-%m-%d")
+    limit_per_minute = int(os.getenv("EODHD_RATE_LIMIT_PER_MINUTE", "1000"))
+    local_output = "data/prices"
+    staging_dir = "data/_staging/prices"
+    staging_prefix = "stock-data/_staging/prices"
+
+    if merge:
+        if s3_bucket:
+            # Start from an empty staging dir so only what's in S3 now is seen
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            download_from_s3(s3_bucket, staging_prefix, staging_dir)
+        result = merge_shards(staging_dir, local_output, merge)
+        write_watermark(
+            local_output,
+            start_date=result["start_date"],
+            end_date=result["end_date"],
+            shards=merge,
+            securities=result["securities"],
+            rows=result["rows"],
+        )
+        if s3_bucket:
+            upload_to_s3(local_output, s3_bucket, "stock-data/prices")
+        return
+
+    if shard:
+        # One host of a multi-host run: every host must shard the same
+        # universe, built once by the coordinator (`ingest universe`), so
+        # always take the latest copy from S3
+        shard_index, num_shards = parse_shard(shard)
+        if s3_bucket:
+            download_from_s3(s3_bucket, "stock-data/security_master", SECURITY_MASTER_DIR)
+        securities, _ = load_security_master()
+        universe_ids = load_universe_ids()
+        if not universe_ids:
+            raise RuntimeError("No universe; run `python -m pipeline ingest universe` first")
+        securities = securities.filter(pl.col("security_id").is_in(universe_ids))
+
+        delay = rate_limit_delay(limit_per_minute, num_shards, shared_budget=not split_budget)
+        summary = ingest_shard(
+            shard_index, num_shards, securities, start_date, end_date, api_key, delay, staging_dir, force
+        )
+        if summary["no_data_tickers"]:
+            save_no_data_tickers(summary["no_data_tickers"])
+        if summary["failed"]:
+            save_failed_tickers(summary["failed_tickers"])
+        elif s3_bucket:
+            # Marker last, so a merge never sees it before the files it lists
+            local_shard = shard_dir(staging_dir, shard_index, num_shards)
+            upload_to_s3(str(local_shard), s3_bucket, f"{staging_prefix}/{local_shard.name}")
+            upload_to_s3(str(local_shard), s3_bucket, f"{staging_prefix}/{local_shard.name}", pattern=SUCCESS_MARKER)
+        print(f"✓ Shard {shard_index}/{num_shards}: {summary['successful']} tickers, {summary['total_rows']:,} rows")
+        return
+
+    # Load tickers (updates the security master)
+    exchanges = load_settings()["eodhd"]["exchanges"]
+    securities = load_universe(ticker_files_for_exchanges(exchanges, ticker_file))
+    print(f"Loaded {securities.height} securities")
     
     print(f"\n{'='*60}")
     print(f"EODHD Price Data Ingestion")
     print(f"{'='*60}")
-    print(f"Tickers: {len(tickers)}")
+    print(f"Tickers: {securities.height}")
     print(f"Date range: {start_date} to {end_date}")
+    print(f"Workers: {workers}")
     print(f"{'='*60}\n")
     
-    # Fetch data
-    df, summary = fetch_prices_for_tickers(client, tickers, start_date, end_date)
-    
-    # Save locally
-    local_output = "data/prices"
-    partition_and_save_local(df, local_output)
+    if workers > 1:
+        # One shard per local process, sharing this host's API budget
+        import multiprocessing
+
+        delay = rate_limit_delay(limit_per_minute, workers, shared_budget=not split_budget)
+        shard_args = [
+            (i, workers, securities, start_date, end_date, api_key, delay, staging_dir, force)
+            for i in range(workers)
+        ]
+        # spawn, not fork: polars' thread pool isn't fork-safe
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            summary = combine_summaries(pool.starmap(ingest_shard, shard_args))
+
+        if summary["failed"]:
+            # Shards with failures aren't marked done; rerun to retry them
+            save_failed_tickers(summary["failed_tickers"])
+            print("[WARNING] Not merging: rerun to retry the unfinished shards")
+            return
+
+        run_ids = [shard_run_id(securities, i, workers, start_date, end_date) for i in range(workers)]
+        result = merge_shards(staging_dir, local_output, workers, run_ids=run_ids)
+
+        # Shards skipped as already done report nothing; their markers have the counts
+        summary = combine_summaries(list(read_shard_markers(staging_dir, workers).values()))
+        securities_ingested, rows_ingested = result["securities"], result["rows"]
+    else:
+        # Fetch data
+        client = EODHDClient(api_key, rate_limit_delay=rate_limit_delay(limit_per_minute, 1))
+        df, summary = fetch_prices_for_tickers(client, securities, start_date, end_date)
+        
+        # Save locally
+        partition_and_save_local(df, local_output)
+        securities_ingested, rows_ingested = summary["successful"], summary["total_rows"]
+
+    write_watermark(
+        local_output,
+        start_date=start_date,
+        end_date=end_date,
+        securities=securities_ingested,
+        rows=rows_ingested,
+    )
     
     # Upload to S3
     if s3_bucket:
+        upload_to_s3(SECURITY_MASTER_DIR, s3_bucket, "stock-data/security_master")
         upload_to_s3(local_output, s3_bucket, "stock-data/prices")
     
     # Print summary
@@ -172,17 +480,24 @@ def main():
     print(f"Total tickers: {summary['total_tickers']}")
     print(f"✓ Successful: {summary['successful']}")
     print(f"✗ Failed: {summary['failed']}")
+    print(f"No data: {len(summary['no_data_tickers'])}")
     print(f"Total rows ingested: {summary['total_rows']:,}")
     print(f"Time elapsed: {elapsed/60:.1f} minutes")
     print(f"{'='*60}")
     
     if summary['failed_tickers']:
-        print(f"\nFailed tickers: {', '.join(summary['failed_tickers'])}")
-        # Save failed tickers to file for retry
-        with open("data/failed_tickers.txt", "w") as f:
-            f.write("\n".join(summary['failed_tickers']))
-        print("Failed tickers saved to data/failed_tickers.txt")
+        save_failed_tickers(summary['failed_tickers'])
+    if summary['no_data_tickers']:
+        save_no_data_tickers(summary['no_data_tickers'])
 
 
-if __name__ == "__main__":
-    main()
+def build_universe(ticker_file: str = "config/tickers.txt"):
+    """Build/update the security master only (coordinator step before sharded runs)."""
+    load_dotenv()
+    exchanges = load_settings()["eodhd"]["exchanges"]
+    securities = load_universe(ticker_files_for_exchanges(exchanges, ticker_file))
+
+    s3_bucket = os.getenv("S3_BUCKET")
+    if s3_bucket:
+        upload_to_s3(SECURITY_MASTER_DIR, s3_bucket, "stock-data/security_master")
+    print(f"✓ Universe: {securities.height} securities across {', '.join(exchanges)}")
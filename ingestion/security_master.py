@@ -0,0 +1,232 @@
+"""
+Security master
+
+Gives every (symbol, exchange) pair a stable integer security_id. Prices,
+fundamentals, features and predictions store security_id (Int32) as their
+join key instead of strings like "AAPL.US"; symbols are only attached back
+at the edges (ingestion from EODHD, reports, query results).
+
+Two tables are kept under data/security_master/:
+- securities.parquet:     one row per security (current symbol, exchange, delisting)
+- symbol_aliases.parquet: every symbol a security has traded under -> security_id
+
+plus universe.parquet, the security_ids selected by the last universe build
+(the ticker files), which sharded runs split between hosts.
+
+IDs are never reassigned: an existing master is loaded first and new
+securities get the next free ID. Renames and delistings come from
+config/symbol_changes.txt, so FISV and FI resolve to the same security. If a
+rename joins two symbols that already had IDs, the oldest ID is kept and the
+other security is merged into it.
+"""
+
+from pathlib import Path
+from datetime import date
+
+import polars as pl
+
+
+SECURITY_MASTER_DIR = "data/security_master"
+SYMBOL_CHANGES_FILE = "config/symbol_changes.txt"
+
+SECURITIES_SCHEMA = {
+    "security_id": pl.Int32,
+    "symbol": pl.Utf8,
+    "exchange": pl.Utf8,
+    "delisted_date": pl.Date,
+}
+
+ALIASES_SCHEMA = {
+    "security_id": pl.Int32,
+    "symbol": pl.Utf8,
+    "exchange": pl.Utf8,
+}
+
+
+def load_symbol_changes(changes_file: str = SYMBOL_CHANGES_FILE) -> dict:
+    """
+    Read renames/delistings into {(exchange, old_symbol): (new_symbol, effective_date)}.
+    new_symbol is None for a delisting.
+    """
+    changes = {}
+    path = Path(changes_file)
+    if not path.exists():
+        return changes
+
+    with open(path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            exchange, old_symbol, new_symbol, effective_date = [part.strip() for part in line.split(",")]
+            changes[(exchange, old_symbol)] = (
+                new_symbol or None,
+                date.fromisoformat(effective_date),
+            )
+
+    return changes
+
+
+def _resolve(symbol: str, exchange: str, changes: dict) -> tuple[str, date | None]:
+    """Follow renames to the latest symbol; return it with its delisting date (if any)."""
+    seen = set()
+    while (exchange, symbol) in changes and symbol not in seen:
+        seen.add(symbol)
+        new_symbol, effective_date = changes[(exchange, symbol)]
+        if new_symbol is None:
+            return symbol, effective_date
+        symbol = new_symbol
+    return symbol, None
+
+
+def load_security_master(master_dir: str = SECURITY_MASTER_DIR) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Load (securities, aliases); empty frames if no master has been built yet."""
+    securities_file = Path(master_dir) / "securities.parquet"
+    aliases_file = Path(master_dir) / "symbol_aliases.parquet"
+
+    if not securities_file.exists() or not aliases_file.exists():
+        return pl.DataFrame(schema=SECURITIES_SCHEMA), pl.DataFrame(schema=ALIASES_SCHEMA)
+
+    return pl.read_parquet(securities_file), pl.read_parquet(aliases_file)
+
+
+def build_security_master(
+    tickers_by_exchange: dict[str, list[str]],
+    changes: dict,
+    existing: tuple[pl.DataFrame, pl.DataFrame] | None = None,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Merge ticker lists and symbol changes into the security master.
+
+    Args:
+        tickers_by_exchange: {"US": ["AAPL", "FISV", ...]} (bare symbols, no suffix)
+        changes: Output of load_symbol_changes()
+        existing: Previously saved (securities, aliases); their IDs are kept
+
+    Returns:
+        (securities, aliases) DataFrames
+    """
+    securities, aliases = existing if existing is not None else (
+        pl.DataFrame(schema=SECURITIES_SCHEMA),
+        pl.DataFrame(schema=ALIASES_SCHEMA),
+    )
+
+    alias_ids = {
+        (row["exchange"], row["symbol"]): row["security_id"]
+        for row in aliases.iter_rows(named=True)
+    }
+    security_rows = {row["security_id"]: row for row in securities.iter_rows(named=True)}
+    next_id = max(security_rows, default=0) + 1
+
+    # Every symbol we know about, in ticker file order so new IDs are deterministic
+    candidates = []
+    for exchange, tickers in tickers_by_exchange.items():
+        candidates.extend((exchange, ticker) for ticker in tickers)
+    for (exchange, old_symbol), (new_symbol, _) in changes.items():
+        candidates.append((exchange, old_symbol))
+        if new_symbol:
+            candidates.append((exchange, new_symbol))
+
+    # Group symbols that rename into each other under their latest symbol
+    groups = {}
+    for exchange, symbol in candidates:
+        current_symbol, delisted_date = _resolve(symbol, exchange, changes)
+        group = groups.setdefault((exchange, current_symbol), {"members": [], "delisted_date": delisted_date})
+        if symbol not in group["members"]:
+            group["members"].append(symbol)
+
+    for (exchange, current_symbol), group in groups.items():
+        members = [current_symbol] + [s for s in group["members"] if s != current_symbol]
+        known_ids = sorted({alias_ids[(exchange, s)] for s in members if (exchange, s) in alias_ids})
+
+        if known_ids:
+            # A rename added after both symbols got IDs: keep the oldest ID and
+            # fold the others into it, so no security is left without aliases
+            security_id = known_ids[0]
+            for merged_id in known_ids[1:]:
+                security_rows.pop(merged_id, None)
+                for key, alias_id in alias_ids.items():
+                    if alias_id == merged_id:
+                        alias_ids[key] = security_id
+                print(
+                    f"[WARNING] {exchange}:{current_symbol}: merged security_id {merged_id} into {security_id}; "
+                    f"re-ingest prices to move its history"
+                )
+        else:
+            security_id = next_id
+            next_id += 1
+
+        security_rows[security_id] = {
+            "security_id": security_id,
+            "symbol": current_symbol,
+            "exchange": exchange,
+            "delisted_date": group["delisted_date"],
+        }
+        for symbol in members:
+            alias_ids[(exchange, symbol)] = security_id
+
+    securities = pl.DataFrame(
+        list(security_rows.values()), schema=SECURITIES_SCHEMA
+    ).sort("security_id")
+    aliases = pl.DataFrame(
+        [
+            {"security_id": security_id, "symbol": symbol, "exchange": exchange}
+            for (exchange, symbol), security_id in alias_ids.items()
+        ],
+        schema=ALIASES_SCHEMA,
+    ).sort(["security_id", "symbol"])
+
+    return securities, aliases
+
+
+def save_security_master(securities: pl.DataFrame, aliases: pl.DataFrame, master_dir: str = SECURITY_MASTER_DIR):
+    output_dir = Path(master_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    securities.write_parquet(output_dir / "securities.parquet", compression="snappy")
+    aliases.write_parquet(output_dir / "symbol_aliases.parquet", compression="snappy")
+
+    print(f"✓ Saved security master: {securities.height:,} securities, {aliases.height:,} symbols")
+
+
+def save_universe(security_ids: list[int], master_dir: str = SECURITY_MASTER_DIR):
+    output_dir = Path(master_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pl.DataFrame({"security_id": security_ids}, schema={"security_id": pl.Int32}).write_parquet(
+        output_dir / "universe.parquet", compression="snappy"
+    )
+
+
+def load_universe_ids(master_dir: str = SECURITY_MASTER_DIR) -> list[int]:
+    """security_ids of the last universe build; empty if none was saved."""
+    path = Path(master_dir) / "universe.parquet"
+    if not path.exists():
+        return []
+    return pl.read_parquet(path).get_column("security_id").to_list()
+
+
+def resolve_security_ids(symbols: list[str], aliases: pl.DataFrame, exchange: str = "US") -> list[int]:
+    """
+    Map symbols to security_ids through the aliases, so old tickers resolve
+    to their renamed security. Accepts "AAPL.US" or bare "AAPL" (on
+    `exchange`). Unknown symbols are skipped with a warning; order is kept
+    and duplicates dropped.
+    """
+    lookup = {
+        f"{row['symbol']}.{row['exchange']}": row["security_id"]
+        for row in aliases.iter_rows(named=True)
+    }
+
+    security_ids = []
+    missing = []
+    for symbol in symbols:
+        key = symbol if symbol in lookup else f"{symbol}.{exchange}"
+        if key in lookup:
+            security_ids.append(lookup[key])
+        else:
+            missing.append(symbol)
+
+    if missing:
+        print(f"[WARNING] {len(missing)} symbols not in security master: {', '.join(missing[:10])}")
+
+    return list(dict.fromkeys(security_ids))
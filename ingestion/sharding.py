@@ -0,0 +1,169 @@
+"""
+Sharded ingestion helpers
+
+The universe is split by a stable hash of security_id, so a given security
+always lands in the same shard no matter which process or host runs it.
+Each shard writes its own files under <staging_dir>/shard=III-of-NNN/
+(outside the dataset, so readers never see partial shards) and drops a
+_SUCCESS marker when done; a final merge step combines the shards into the
+normal year-partitioned dataset.
+
+A shard's run_id is its date range plus a hash of its security_ids, so
+adding tickers re-runs the shards they land in. The marker lists the files
+the run wrote, and the merge reads only those: leftovers from earlier runs
+(in S3 or a reused staging dir) are never merged.
+"""
+
+import hashlib
+import json
+import zlib
+from pathlib import Path
+
+import polars as pl
+
+
+SUCCESS_MARKER = "_SUCCESS"
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse "3/8" (zero-based shard index / shard count)."""
+    index, count = (int(part) for part in spec.split("/"))
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec {spec!r}; expected INDEX/COUNT with 0 <= INDEX < COUNT")
+    return index, count
+
+
+def shard_of(security_id: int, num_shards: int) -> int:
+    # crc32 is stable across processes and Python versions (unlike hash())
+    return zlib.crc32(str(security_id).encode()) % num_shards
+
+
+def filter_shard(securities: pl.DataFrame, shard_index: int, num_shards: int) -> pl.DataFrame:
+    mask = [shard_of(security_id, num_shards) == shard_index for security_id in securities.get_column("security_id")]
+    return securities.filter(pl.Series(mask))
+
+
+def shard_dir(staging_dir: str, shard_index: int, num_shards: int) -> Path:
+    return Path(staging_dir) / f"shard={shard_index:03d}-of-{num_shards:03d}"
+
+
+def rate_limit_delay(limit_per_minute: int, num_shards: int, shared_budget: bool = True) -> float:
+    """
+    Per-request delay for one shard. With a shared budget all shards draw on
+    one API key, so each gets 1/num_shards of the per-minute limit. With a
+    split budget every shard has its own key and the full limit.
+    """
+    concurrent = num_shards if shared_budget else 1
+    return 60.0 / limit_per_minute * concurrent
+
+
+def shard_run_id(securities: pl.DataFrame, shard_index: int, num_shards: int, start_date: str, end_date: str) -> str:
+    """"START:END:HASH", where HASH covers the sorted security_ids in the shard."""
+    security_ids = sorted(filter_shard(securities, shard_index, num_shards).get_column("security_id").to_list())
+    digest = hashlib.sha256(",".join(map(str, security_ids)).encode()).hexdigest()[:12]
+    return f"{start_date}:{end_date}:{digest}"
+
+
+def is_shard_done(staging_dir: str, shard_index: int, num_shards: int, run_id: str) -> bool:
+    """True if the shard finished for this run (same date range and securities)."""
+    marker = shard_dir(staging_dir, shard_index, num_shards) / SUCCESS_MARKER
+    if not marker.exists():
+        return False
+    with open(marker, "r") as f:
+        return json.load(f).get("run_id") == run_id
+
+
+def mark_shard_done(staging_dir: str, shard_index: int, num_shards: int, run_id: str, summary: dict):
+    """Write the _SUCCESS marker, listing the Parquet files this run produced."""
+    path = shard_dir(staging_dir, shard_index, num_shards)
+    path.mkdir(parents=True, exist_ok=True)
+    files = sorted(p.relative_to(path).as_posix() for p in path.rglob("*.parquet"))
+    with open(path / SUCCESS_MARKER, "w") as f:
+        json.dump({"run_id": run_id, "files": files, **summary}, f, indent=2)
+
+
+def read_shard_markers(staging_dir: str, num_shards: int) -> dict[int, dict]:
+    """{shard_index: marker} for every shard that has a _SUCCESS marker."""
+    markers = {}
+    for shard_index in range(num_shards):
+        marker = shard_dir(staging_dir, shard_index, num_shards) / SUCCESS_MARKER
+        if marker.exists():
+            with open(marker, "r") as f:
+                markers[shard_index] = json.load(f)
+    return markers
+
+
+def _date_range(run_id: str) -> tuple[str, str]:
+    start_date, end_date = run_id.split(":")[:2]
+    return start_date, end_date
+
+
+def merge_shards(
+    staging_dir: str,
+    output_dir: str,
+    num_shards: int,
+    run_ids: list[str] | None = None,
+    file_name: str = "prices.parquet",
+) -> dict:
+    """
+    Combine completed shards into <output_dir>/year=YYYY/<file_name>.
+
+    Refuses to merge until every shard has its _SUCCESS marker, either for
+    the expected run_ids (one per shard) or, by default, for one common date
+    range. Only the files each marker lists are read, and each shard must
+    only hold its own securities (no double ingestion).
+    """
+    markers = read_shard_markers(staging_dir, num_shards)
+    if run_ids is not None:
+        missing = [i for i in range(num_shards) if markers.get(i, {}).get("run_id") != run_ids[i]]
+    else:
+        missing = [i for i in range(num_shards) if i not in markers]
+    if missing:
+        raise RuntimeError(f"Shards not finished: {', '.join(map(str, missing))}")
+
+    date_ranges = {_date_range(marker["run_id"]) for marker in markers.values()}
+    if len(date_ranges) > 1:
+        raise RuntimeError(f"Shards come from different runs: {sorted(date_ranges)}")
+    start_date, end_date = date_ranges.pop()
+
+    by_year = {}
+    for shard_index in range(num_shards):
+        path = shard_dir(staging_dir, shard_index, num_shards)
+        for relative_path in markers[shard_index].get("files", []):
+            partition_file = path / relative_path
+            if partition_file.name != file_name:
+                continue
+            if not partition_file.exists():
+                raise RuntimeError(f"{partition_file} is listed in the shard's {SUCCESS_MARKER} but missing")
+            df = pl.read_parquet(partition_file)
+
+            stray = [
+                security_id
+                for security_id in df.get_column("security_id").unique().to_list()
+                if shard_of(security_id, num_shards) != shard_index
+            ]
+            if stray:
+                raise RuntimeError(f"{partition_file} holds {len(stray)} securities from other shards")
+
+            by_year.setdefault(partition_file.parent.name, []).append(df)
+
+    rows = 0
+    security_ids = set()
+    for partition, frames in by_year.items():
+        partition_dir = Path(output_dir) / partition
+        partition_dir.mkdir(parents=True, exist_ok=True)
+
+        merged = pl.concat(frames).sort(["security_id", "Date"])
+        merged.write_parquet(partition_dir / file_name, compression="snappy")
+        rows += merged.height
+        security_ids.update(merged.get_column("security_id").unique().to_list())
+
+        print(f"✓ Merged {len(frames)} shard files into {partition_dir / file_name} ({merged.height:,} rows)")
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "partitions": len(by_year),
+        "securities": len(security_ids),
+        "rows": rows,
+    }
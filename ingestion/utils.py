@@ -49,3 +49,41 @@ def validate_price_data(df):
     HINT: Use pandas/polars validation methods
     """
     pass
+
+
+# Watermarks are tiny JSON files next to each dataset so status checks
+# don't need to import polars/duckdb or scan Parquet.
+WATERMARK_FILE = "_watermark.json"
+
+
+def write_watermark(dataset_dir: str, **info):
+    """Record what was last ingested into dataset_dir (end date, row count, ...)."""
+    import json
+    from datetime import datetime
+    from pathlib import Path
+
+    path = Path(dataset_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    info["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    with open(path / WATERMARK_FILE, "w") as f:
+        json.dump(info, f, indent=2, default=str)
+
+
+def read_watermark(dataset_dir: str) -> dict:
+    """Return the dataset's watermark, or {} if it has never been ingested."""
+    import json
+    from pathlib import Path
+
+    path = Path(dataset_dir) / WATERMARK_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def load_settings(settings_file: str = "config/settings.yaml") -> dict:
+    """Load the pipeline config (config/settings.yaml)."""
+    import yaml
+
+    with open(settings_file, "r") as f:
+        return yaml.safe_load(f)
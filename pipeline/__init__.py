@@ -0,0 +1,5 @@
+"""
+Unified command-line entry point for the pipeline.
+
+Run `python -m pipeline --help` for the available subcommands.
+"""
@@ -0,0 +1,164 @@
+"""
+Pipeline CLI
+
+    python -m pipeline ingest universe
+    python -m pipeline ingest prices [--tickers-file ...] [--start-date ...] [--workers N]
+    python -m pipeline ingest prices --shard I/N | --merge N
+    python -m pipeline ingest macro
+    python -m pipeline features build
+    python -m pipeline db refresh
+    python -m pipeline explain [--model ...] [--start-date ...] [--end-date ...]
+    python -m pipeline bench
+    python -m pipeline status
+
+Only argparse is imported at module load. Each subcommand imports its own
+stage inside its handler, so `--help` and `status` never pay for polars,
+duckdb, boto3 or xgboost, and a cron job only loads what its stage uses.
+"""
+
+import argparse
+
+
+def _ingest_prices(args) -> int:
+    from ingestion.ingest_prices import main
+
+    main(
+        ticker_file=args.tickers_file,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        workers=args.workers,
+        shard=args.shard,
+        merge=args.merge,
+        split_budget=args.split_budget,
+        force=args.force,
+    )
+    return 0
+
+
+def _ingest_universe(args) -> int:
+    from ingestion.ingest_prices import build_universe
+
+    build_universe(ticker_file=args.tickers_file)
+    return 0
+
+
+def _ingest_macro(args) -> int:
+    from ingestion.ingest_macro import main
+
+    main()
+    return 0
+
+
+def _features_build(args) -> int:
+    from features.build_features import main
+
+    main()
+    return 0
+
+
+def _db_refresh(args) -> int:
+    from database.init_db import main
+
+    main()
+    return 0
+
+
+def _explain(args) -> int:
+    from models.explain import main
+
+    main(
+        model_path=args.model,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        batch_size=args.batch_size,
+        workers=args.workers,
+    )
+    return 0
+
+
+def _bench(args) -> int:
+    from analysis.bench import main
+
+    main(repeat=args.repeat)
+    return 0
+
+
+def _status(args) -> int:
+    # Stdlib-only: reads the JSON watermarks written after each ingest
+    from ingestion.utils import read_watermark
+
+    for dataset in args.datasets:
+        watermark = read_watermark(f"data/{dataset}")
+        if not watermark:
+            print(f"{dataset:<14} never ingested")
+            continue
+        details = ", ".join(f"{k}={v}" for k, v in watermark.items())
+        print(f"{dataset:<14} {details}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pipeline", description="EODHD value investing pipeline")
+    parser.add_argument("--offline", action="store_true", help="Serve EODHD requests only from the local cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # ingest <dataset>
+    ingest = commands.add_parser("ingest", help="Fetch data from EODHD")
+    ingest_commands = ingest.add_subparsers(dest="dataset", required=True)
+
+    prices = ingest_commands.add_parser("prices", help="EOD prices -> partitioned Parquet")
+    prices.add_argument("--tickers-file", default="config/tickers.txt")
+    prices.add_argument("--start-date", default="2005-01-01")
+    prices.add_argument("--end-date", default=None, help="Defaults to today")
+    prices.add_argument("--workers", type=int, default=1, help="Local processes, one shard each")
+    sharding = prices.add_mutually_exclusive_group()
+    sharding.add_argument("--shard", default=None, metavar="I/N", help="Run only shard I of N (multi-host)")
+    sharding.add_argument("--merge", type=int, default=None, metavar="N", help="Merge N finished shards")
+    prices.add_argument("--split-budget", action="store_true",
+                        help="Each shard has its own API key/limit instead of sharing one")
+    prices.add_argument("--force", action="store_true", help="Re-run shards that already finished")
+    prices.set_defaults(handler=_ingest_prices)
+
+    universe = ingest_commands.add_parser("universe", help="Build/update the security master only")
+    universe.add_argument("--tickers-file", default="config/tickers.txt")
+    universe.set_defaults(handler=_ingest_universe)
+
+    macro = ingest_commands.add_parser("macro", help="Macro indicators -> cached Parquet (only when due)")
+    macro.set_defaults(handler=_ingest_macro)
+
+    # features build
+    features = commands.add_parser("features", help="Feature engineering")
+    features_commands = features.add_subparsers(dest="action", required=True)
+    features_commands.add_parser("build", help="Build the ml_features panel").set_defaults(handler=_features_build)
+
+    # db refresh
+    db = commands.add_parser("db", help="DuckDB catalog")
+    db_commands = db.add_subparsers(dest="action", required=True)
+    db_commands.add_parser("refresh", help="Recreate tables/views over Parquet").set_defaults(handler=_db_refresh)
+
+    explain = commands.add_parser("explain", help="Per-stock TreeSHAP contributions (cached per model/date)")
+    explain.add_argument("--model", default="models/value_classifier.json")
+    explain.add_argument("--start-date", default=None, help="Defaults to the latest feature date")
+    explain.add_argument("--end-date", default=None)
+    explain.add_argument("--batch-size", type=int, default=50_000)
+    explain.add_argument("--workers", type=int, default=None, help="Concurrent batches")
+    explain.set_defaults(handler=_explain)
+
+    bench = commands.add_parser("bench", help="Time common panel queries")
+    bench.add_argument("--repeat", type=int, default=3)
+    bench.set_defaults(handler=_bench)
+
+    status = commands.add_parser("status", help="Show ingestion watermarks")
+    status.add_argument("datasets", nargs="*", default=["prices", "macro", "features/ml_features"])
+    status.set_defaults(handler=_status)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.offline:
+        import os
+
+        os.environ["EODHD_OFFLINE"] = "1"
+    return args.handler(args)
@@ -0,0 +1,157 @@
+import os
+import time
+
+import pytest
+import requests
+
+from ingestion import eodhd_client
+from ingestion.eodhd_client import EODHDClient
+from ingestion.http_cache import OfflineCacheMiss, ResponseCache, cache_key
+
+
+class FakeResponse:
+    def __init__(self, text: str, status: int = 200):
+        self.text = text
+        self.content = text.encode()
+        self.status_code = status
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}")
+
+
+@pytest.fixture
+def fake_get(monkeypatch):
+    """Stub requests.get; queue bodies in `responses`, inspect `calls`."""
+    state = {"responses": [], "calls": []}
+
+    def get(url, params=None, timeout=None):
+        state["calls"].append((url, dict(params)))
+        return state["responses"].pop(0)
+
+    monkeypatch.setattr(eodhd_client.requests, "get", get)
+    return state
+
+
+def make_client(tmp_path, offline=False) -> EODHDClient:
+    return EODHDClient("secret", rate_limit_delay=0, cache=ResponseCache(str(tmp_path)), offline=offline)
+
+
+def test_cache_key_ignores_token_param_order_and_none():
+    key = cache_key("eod/AAPL.US", {"from": "2024-01-01", "to": "2024-02-01", "api_token": "a"})
+
+    assert key == cache_key("eod/AAPL.US", {"api_token": "b", "to": "2024-02-01", "from": "2024-01-01"})
+    assert key == cache_key("eod/AAPL.US", {"from": "2024-01-01", "to": "2024-02-01", "filter": None})
+    assert key != cache_key("eod/MSFT.US", {"from": "2024-01-01", "to": "2024-02-01"})
+
+
+def test_get_put_roundtrip_and_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("ab" * 32, b"body")
+
+    assert cache.get("ab" * 32, ttl=None) == b"body"
+    assert cache.get("ab" * 32, ttl=60) == b"body"
+    assert cache.get("cd" * 32, ttl=None) is None
+
+    # Stored an hour ago: stale for a 1 minute TTL
+    path = cache._path("ab" * 32)
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    assert cache.get("ab" * 32, ttl=60) is None
+
+
+def test_overwrite_does_not_grow_the_size(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("ab" * 32, b"x" * 100)
+    size = cache._size
+
+    for _ in range(5):
+        cache.put("ab" * 32, b"x" * 100)
+
+    assert cache._size == size
+
+
+def test_evicts_least_recently_used(tmp_path):
+    keys = [f"{i:02d}" * 32 for i in range(4)]
+    cache = ResponseCache(str(tmp_path), max_bytes=10**6)
+    for i, key in enumerate(keys):
+        cache.put(key, os.urandom(1000))
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0], ttl=None) is not None
+
+    entry_size = cache._path(keys[0]).stat().st_size
+    cache.max_bytes = entry_size * 3
+    cache.evict(target_fraction=2 / 3)
+
+    assert [cache._path(key).exists() for key in keys] == [True, False, False, True]
+
+
+def test_get_evicted_between_read_and_touch(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("ab" * 32, b"body")
+
+    def evicted(path, times):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted)
+    assert cache.get("ab" * 32, ttl=None) == b"body"
+
+
+def test_client_serves_repeat_requests_from_cache(tmp_path, fake_get):
+    client = make_client(tmp_path)
+    fake_get["responses"].append(FakeResponse('{"General": {"Name": "Apple"}}'))
+
+    first = client.get_fundamentals("AAPL.US", "General")
+    second = client.get_fundamentals("AAPL.US", "General")
+
+    assert first == second == {"General": {"Name": "Apple"}}
+    assert len(fake_get["calls"]) == 1
+    assert fake_get["calls"][0][1]["api_token"] == "secret"
+
+
+def test_client_parses_eod_csv(tmp_path, fake_get):
+    client = make_client(tmp_path)
+    fake_get["responses"].append(FakeResponse("Date,Close\n2020-01-02,75.09\n"))
+
+    df = client.get_eod_prices("AAPL.US", "2020-01-01", "2020-01-31")
+
+    assert df.get_column("Close").to_list() == [75.09]
+    assert df.get_column("symbol").to_list() == ["AAPL.US"]
+
+
+def test_client_does_not_cache_bodies_that_fail_to_parse(tmp_path, fake_get):
+    client = make_client(tmp_path)
+    fake_get["responses"] += [FakeResponse("<html>maintenance</html>"), FakeResponse('[{"value": 1}]')]
+
+    assert client.get_dividends("AAPL.US", "2020-01-01", "2020-12-31") == []
+    assert client.get_dividends("AAPL.US", "2020-01-01", "2020-12-31") == [{"value": 1}]
+    assert len(fake_get["calls"]) == 2
+
+
+def test_client_does_not_cache_http_errors(tmp_path, fake_get):
+    client = make_client(tmp_path)
+    fake_get["responses"] += [FakeResponse("", status=503), FakeResponse("[]")]
+
+    assert client.get_splits("AAPL.US", "2020-01-01", "2020-12-31") == []
+    assert client.get_splits("AAPL.US", "2020-01-01", "2020-12-31") == []
+    assert len(fake_get["calls"]) == 2
+
+
+def test_offline_serves_cached_and_raises_on_miss(tmp_path, fake_get):
+    fake_get["responses"].append(FakeResponse("[]"))
+    make_client(tmp_path).get_splits("AAPL.US", "2020-01-01", "2020-12-31")
+
+    offline = make_client(tmp_path, offline=True)
+    assert offline.get_splits("AAPL.US", "2020-01-01", "2020-12-31") == []
+    with pytest.raises(OfflineCacheMiss):
+        offline._get("splits", "splits/MSFT.US", {"from": "2020-01-01", "to": "2020-12-31"})
+    assert len(fake_get["calls"]) == 1
+
+
+def test_closed_ranges_never_expire(tmp_path):
+    client = make_client(tmp_path)
+
+    assert client._ttl("eod", {"to": "2020-12-31"}) is None
+    assert client._ttl("eod", {"to": time.strftime("%Y-%m-%d")}) == eodhd_client.CACHE_TTLS["eod"]
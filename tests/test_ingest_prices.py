@@ -0,0 +1,48 @@
+import polars as pl
+import requests
+
+from ingestion.ingest_prices import fetch_prices_for_tickers, is_retryable
+from ingestion.security_master import SECURITIES_SCHEMA
+
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status}", response=response)
+
+
+class FakeClient:
+    def get_eod_prices(self, symbol, start_date, end_date, raise_errors=False):
+        if symbol == "DEADTICK.US":
+            return pl.DataFrame()
+        if symbol == "GONE.US":
+            raise http_error(404)
+        if symbol == "FLAKY.US":
+            raise requests.ConnectionError("connection reset")
+        return pl.DataFrame({"Date": ["2024-01-02"], "close": [1.0], "symbol": [symbol]})
+
+
+def test_is_retryable():
+    assert is_retryable(requests.ConnectionError())
+    assert is_retryable(http_error(429))
+    assert is_retryable(http_error(503))
+    assert not is_retryable(http_error(404))
+
+
+def test_no_data_is_reported_but_not_failed():
+    securities = pl.DataFrame(
+        {
+            "security_id": [1, 2, 3, 4],
+            "symbol": ["AAPL", "DEADTICK", "GONE", "FLAKY"],
+            "exchange": ["US"] * 4,
+            "delisted_date": [None] * 4,
+        },
+        schema=SECURITIES_SCHEMA,
+    )
+
+    df, summary = fetch_prices_for_tickers(FakeClient(), securities, "2024-01-01", "2024-01-31")
+
+    assert df.get_column("security_id").to_list() == [1]
+    assert summary["successful"] == 1
+    assert summary["failed_tickers"] == ["FLAKY.US"]
+    assert summary["no_data_tickers"] == ["DEADTICK.US", "GONE.US"]
@@ -0,0 +1,80 @@
+from datetime import date
+
+import polars as pl
+
+from ingestion.security_master import (
+    build_security_master,
+    load_security_master,
+    resolve_security_ids,
+    save_security_master,
+)
+
+
+def ids_by_symbol(aliases: pl.DataFrame) -> dict:
+    return {row["symbol"]: row["security_id"] for row in aliases.iter_rows(named=True)}
+
+
+def test_new_securities_get_ids_in_ticker_file_order():
+    securities, aliases = build_security_master({"US": ["AAPL", "MSFT", "GOOG"]}, {})
+
+    assert securities.get_column("symbol").to_list() == ["AAPL", "MSFT", "GOOG"]
+    assert ids_by_symbol(aliases) == {"AAPL": 1, "MSFT": 2, "GOOG": 3}
+
+
+def test_ids_are_stable_across_rebuilds(tmp_path):
+    first = build_security_master({"US": ["AAPL", "MSFT"]}, {})
+    save_security_master(*first, master_dir=str(tmp_path))
+
+    # New ticker listed first, an old one dropped: existing IDs don't move
+    securities, aliases = build_security_master(
+        {"US": ["NVDA", "MSFT"]}, {}, existing=load_security_master(str(tmp_path))
+    )
+
+    assert ids_by_symbol(aliases) == {"AAPL": 1, "MSFT": 2, "NVDA": 3}
+    assert securities.height == 3
+
+
+def test_rename_maps_both_symbols_to_one_security():
+    changes = {("US", "FISV"): ("FI", date(2023, 6, 6))}
+    securities, aliases = build_security_master({"US": ["FISV"]}, changes)
+
+    assert securities.rows() == [(1, "FI", "US", None)]
+    assert ids_by_symbol(aliases) == {"FI": 1, "FISV": 1}
+
+
+def test_rename_keeps_the_old_id_when_added_later():
+    existing = build_security_master({"US": ["FISV"]}, {})
+    changes = {("US", "FISV"): ("FI", date(2023, 6, 6))}
+
+    securities, aliases = build_security_master({"US": ["FI"]}, changes, existing=existing)
+
+    assert securities.rows() == [(1, "FI", "US", None)]
+    assert ids_by_symbol(aliases) == {"FI": 1, "FISV": 1}
+
+
+def test_rename_between_two_known_securities_keeps_the_oldest_id():
+    existing = build_security_master({"US": ["AAA", "BBB", "CCC"]}, {})
+    changes = {("US", "AAA"): ("BBB", date(2024, 1, 1))}
+
+    securities, aliases = build_security_master({"US": ["BBB", "CCC"]}, changes, existing=existing)
+
+    # No dangling row for BBB's old ID, and every alias points at a security
+    assert securities.get_column("security_id").to_list() == [1, 3]
+    assert securities.filter(pl.col("security_id") == 1).get_column("symbol").item() == "BBB"
+    assert ids_by_symbol(aliases) == {"AAA": 1, "BBB": 1, "CCC": 3}
+    assert set(aliases.get_column("security_id")) <= set(securities.get_column("security_id"))
+
+
+def test_delisting_records_the_date():
+    changes = {("US", "TWTR"): (None, date(2022, 10, 28))}
+    securities, _ = build_security_master({"US": ["AAPL"]}, changes)
+
+    delisted = securities.filter(pl.col("symbol") == "TWTR")
+    assert delisted.get_column("delisted_date").item() == date(2022, 10, 28)
+
+
+def test_resolve_security_ids_accepts_suffixed_and_bare_symbols():
+    changes = {("US", "FISV"): ("FI", date(2023, 6, 6))}
+    _, aliases = build_security_master({"US": ["AAPL", "FI"]}, changes)
+
+    assert resolve_security_ids(["FISV.US", "AAPL", "FI", "UNKNOWN"], aliases) == [2, 1]
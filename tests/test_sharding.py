@@ -0,0 +1,175 @@
+import json
+
+import polars as pl
+import pytest
+
+from ingestion.sharding import (
+    SUCCESS_MARKER,
+    filter_shard,
+    is_shard_done,
+    mark_shard_done,
+    merge_shards,
+    parse_shard,
+    rate_limit_delay,
+    shard_dir,
+    shard_of,
+    shard_run_id,
+)
+
+
+START, END = "2024-01-01", "2024-12-31"
+
+
+def universe(n: int = 20) -> pl.DataFrame:
+    return pl.DataFrame({"security_id": list(range(1, n + 1))}, schema={"security_id": pl.Int32})
+
+
+def stage_shard(staging_dir, securities, shard_index, num_shards, run_id=None, year=2024):
+    """Write a shard's partition as ingest_shard would and mark it done."""
+    ids = filter_shard(securities, shard_index, num_shards).get_column("security_id")
+    partition_dir = shard_dir(staging_dir, shard_index, num_shards) / f"year={year}"
+    partition_dir.mkdir(parents=True, exist_ok=True)
+    pl.DataFrame({
+        "security_id": ids,
+        "Date": [f"{year}-01-02"] * len(ids),
+        "close": [1.0] * len(ids),
+    }).write_parquet(partition_dir / "prices.parquet")
+
+    run_id = run_id or shard_run_id(securities, shard_index, num_shards, START, END)
+    mark_shard_done(str(staging_dir), shard_index, num_shards, run_id, {"successful": len(ids)})
+    return run_id
+
+
+def test_parse_shard():
+    assert parse_shard("2/8") == (2, 8)
+    for spec in ("8/8", "-1/8", "0/0"):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_shards_partition_the_universe():
+    securities = universe(100)
+    shards = [set(filter_shard(securities, i, 4).get_column("security_id")) for i in range(4)]
+
+    assert set().union(*shards) == set(range(1, 101))
+    assert sum(len(shard) for shard in shards) == 100
+    assert all(shard_of(security_id, 4) == i for i, shard in enumerate(shards) for security_id in shard)
+
+
+def test_rate_limit_delay_splits_a_shared_budget():
+    assert rate_limit_delay(1000, 4) == pytest.approx(0.24)
+    assert rate_limit_delay(1000, 4, shared_budget=False) == pytest.approx(0.06)
+
+
+def test_run_id_changes_only_for_shards_whose_securities_change():
+    before = universe(20)
+    after = universe(21)
+    changed = shard_of(21, 4)
+
+    for i in range(4):
+        same = shard_run_id(before, i, 4, START, END) == shard_run_id(after, i, 4, START, END)
+        assert same == (i != changed)
+
+
+def test_is_shard_done_matches_the_run(tmp_path):
+    securities = universe()
+    run_id = stage_shard(tmp_path, securities, 0, 2)
+
+    assert is_shard_done(str(tmp_path), 0, 2, run_id)
+    assert not is_shard_done(str(tmp_path), 0, 2, shard_run_id(securities, 0, 2, START, "2025-01-01"))
+    assert not is_shard_done(str(tmp_path), 1, 2, run_id)
+
+
+def test_merge_combines_shards_sorted(tmp_path):
+    securities = universe()
+    run_ids = [stage_shard(tmp_path / "staging", securities, i, 3) for i in range(3)]
+
+    result = merge_shards(str(tmp_path / "staging"), str(tmp_path / "out"), 3, run_ids=run_ids)
+
+    merged = pl.read_parquet(tmp_path / "out" / "year=2024" / "prices.parquet")
+    assert merged.get_column("security_id").to_list() == list(range(1, 21))
+    assert result == {
+        "start_date": START,
+        "end_date": END,
+        "partitions": 1,
+        "securities": 20,
+        "rows": 20,
+    }
+
+
+def test_merge_refuses_unfinished_shards(tmp_path):
+    securities = universe()
+    stage_shard(tmp_path / "staging", securities, 0, 2)
+
+    with pytest.raises(RuntimeError, match="not finished: 1"):
+        merge_shards(str(tmp_path / "staging"), str(tmp_path / "out"), 2)
+
+
+def test_merge_refuses_stale_runs(tmp_path):
+    securities = universe()
+    stage_shard(tmp_path / "staging", securities, 0, 2)
+    stage_shard(tmp_path / "staging", securities, 1, 2)
+    expected = [shard_run_id(universe(30), i, 2, START, END) for i in range(2)]
+
+    with pytest.raises(RuntimeError, match="not finished"):
+        merge_shards(str(tmp_path / "staging"), str(tmp_path / "out"), 2, run_ids=expected)
+
+
+def test_merge_refuses_mixed_date_ranges(tmp_path):
+    securities = universe()
+    stage_shard(tmp_path / "staging", securities, 0, 2)
+    stage_shard(tmp_path / "staging", securities, 1, 2, run_id=f"{START}:2025-06-30:abc")
+
+    with pytest.raises(RuntimeError, match="different runs"):
+        merge_shards(str(tmp_path / "staging"), str(tmp_path / "out"), 2)
+
+
+def test_merge_ignores_files_not_listed_in_the_marker(tmp_path):
+    securities = universe()
+    for i in range(2):
+        stage_shard(tmp_path / "staging", securities, i, 2)
+
+    # Leftover from an earlier run of shard 0, e.g. still in S3
+    stale_dir = shard_dir(str(tmp_path / "staging"), 0, 2) / "year=2019"
+    stale_dir.mkdir()
+    pl.DataFrame({"security_id": [1], "Date": ["2019-01-02"], "close": [1.0]}).write_parquet(
+        stale_dir / "prices.parquet"
+    )
+
+    result = merge_shards(str(tmp_path / "staging"), str(tmp_path / "out"), 2)
+
+    assert result["partitions"] == 1
+    assert not (tmp_path / "out" / "year=2019").exists()
+
+
+def test_merge_refuses_missing_listed_files(tmp_path):
+    securities = universe()
+    for i in range(2):
+        stage_shard(tmp_path / "staging", securities, i, 2)
+    (shard_dir(str(tmp_path / "staging"), 1, 2) / "year=2024" / "prices.parquet").unlink()
+
+    with pytest.raises(RuntimeError, match="missing"):
+        merge_shards(str(tmp_path / "staging"), str(tmp_path / "out"), 2)
+
+
+def test_merge_refuses_securities_from_other_shards(tmp_path):
+    securities = universe()
+    for i in range(2):
+        stage_shard(tmp_path / "staging", securities, i, 2)
+
+    # Shard 1's data copied into shard 0: double ingestion
+    shard_0 = shard_dir(str(tmp_path / "staging"), 0, 2)
+    other = pl.read_parquet(shard_dir(str(tmp_path / "staging"), 1, 2) / "year=2024" / "prices.parquet")
+    other.write_parquet(shard_0 / "year=2024" / "prices.parquet")
+
+    with pytest.raises(RuntimeError, match="other shards"):
+        merge_shards(str(tmp_path / "staging"), str(tmp_path / "out"), 2)
+
+
+def test_marker_lists_the_run_files(tmp_path):
+    stage_shard(tmp_path, universe(), 0, 2)
+
+    with open(shard_dir(str(tmp_path), 0, 2) / SUCCESS_MARKER) as f:
+        marker = json.load(f)
+
+    assert marker["files"] == ["year=2024/prices.parquet"]